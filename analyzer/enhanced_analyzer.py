@@ -36,8 +36,15 @@ except ImportError:
     INPUT_SANITIZER_AVAILABLE = False
     logging.warning("⚠️ Input sanitizer not available - using basic validation")
 
+from utils.rate_limiter import TokenBucket
+
 logger = logging.getLogger("EnhancedAnalyzer")
 
+# ✅ Shared across analyzer instances so concurrent scans coordinate
+# (Angel One SmartAPI limits: LTP 10 req/s, candle data 3 req/s)
+_LTP_RATE_LIMITER = TokenBucket(rate=10, burst=10)
+_HISTORICAL_RATE_LIMITER = TokenBucket(rate=3, burst=3)
+
 
 class EnhancedAnalyzer:
     """
@@ -93,6 +100,7 @@ class EnhancedAnalyzer:
         """
         for attempt in range(max_retries):
             try:
+                _LTP_RATE_LIMITER.acquire()
                 price = self.data_provider.get_ltp(symbol, exchange)
                 if price and price > 0:
                     return price
@@ -135,7 +143,7 @@ class EnhancedAnalyzer:
                     raise ValueError(f"Invalid exchange: {exchange}")
 
             # Rate limiting for historical data API
-            time.sleep(0.5)
+            _HISTORICAL_RATE_LIMITER.acquire()
             
             # Get historical data for indicators
             df = self.data_provider.get_historical(
@@ -483,10 +491,6 @@ class EnhancedAnalyzer:
                     signals.append(signal)
             except Exception as e:
                 logger.error(f"Error analyzing {sym}: {e}")
-            
-            # ✅ FIXED: Single rate limit delay (removed duplicate)
-            if idx < total_symbols - 1:
-                time.sleep(0.25)
         
         signals.sort(key=lambda x: x['confidence'], reverse=True)
         logger.info(f"Analysis complete: {len(signals)} valid signals found")
@@ -525,8 +529,10 @@ class EnhancedAnalyzer:
         
         for index in indices:
             try:
+                _LTP_RATE_LIMITER.acquire()
                 ltp = self.data_provider.get_ltp(index, "NSE")
                 if ltp:
+                    _HISTORICAL_RATE_LIMITER.acquire()
                     df = self.data_provider.get_historical(index, period_days=5)
                     if not df.empty:
                         prev_close = df['close'].iloc[-2] if len(df) > 1 else ltp
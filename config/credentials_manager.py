@@ -2,7 +2,8 @@
 import os
 import json
 import logging
-from typing import Tuple, Dict, Any
+from functools import lru_cache
+from typing import Tuple, Dict, Any, Optional
 
 logger = logging.getLogger("CredentialsManager")
 
@@ -36,6 +37,32 @@ def _atomic_write_bytes(path: str, data: bytes) -> None:
     os.replace(tmp, path)
 
 
+# One Fernet per key per process, shared by every manager instance
+_fernet_cache: Dict[bytes, Any] = {}
+
+
+def _get_fernet(key: bytes):
+    fernet = _fernet_cache.get(key)
+    if fernet is None:
+        fernet = _fernet_cache[key] = Fernet(key)
+    return fernet
+
+
+@lru_cache(maxsize=4)
+def _read_creds_cached(path: str, mtime_ns: int, key: Optional[bytes]) -> Dict[str, Any]:
+    """Read and decrypt the credentials file; keyed by mtime so edits invalidate"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if key:
+        try:
+            raw = _get_fernet(key).decrypt(data)
+        except Exception:
+            raw = data  # Fallback if old plain
+    else:
+        raw = data
+    return json.loads(raw.decode("utf-8"))
+
+
 class SecureCredentialsManager:
     def __init__(self, config_dir: str = "config"):
         self.project_config_dir = config_dir
@@ -51,6 +78,7 @@ class SecureCredentialsManager:
         except Exception:
             pass
         self._fernet = None
+        self._key = None
         if _CRYPTO_OK:
             try:
                 if not os.path.exists(self._key_file):
@@ -59,10 +87,12 @@ class SecureCredentialsManager:
                     logger.info("New encryption key generated")
                 with open(self._key_file, "rb") as kf:
                     key = kf.read()
-                self._fernet = Fernet(key)
+                self._fernet = _get_fernet(key)
+                self._key = key
             except Exception as e:
                 logger.warning(f"Encryption disabled: {e}")
                 self._fernet = None
+                self._key = None
         logger.info("Credentials manager initialized")
 
     def save_credentials(self, api_key: str, client_code: str, password: str, totp_secret: str = "") -> Tuple[bool, str]:
@@ -79,6 +109,7 @@ class SecureCredentialsManager:
             else:
                 data = raw
             _atomic_write_bytes(self._cred_file, data)
+            _read_creds_cached.cache_clear()
             logger.info("Credentials saved")
             return True, "Saved"
         except Exception as e:
@@ -89,16 +120,8 @@ class SecureCredentialsManager:
         if not os.path.exists(self._cred_file):
             return False, {}
         try:
-            with open(self._cred_file, "rb") as f:
-                data = f.read()
-            if self._fernet:
-                try:
-                    raw = self._fernet.decrypt(data)
-                except Exception:
-                    raw = data  # Fallback if old plain
-            else:
-                raw = data
-            payload = json.loads(raw.decode("utf-8"))
+            mtime_ns = os.stat(self._cred_file).st_mtime_ns
+            payload = dict(_read_creds_cached(self._cred_file, mtime_ns, self._key))
             logger.info("Credentials loaded")
             return True, payload
         except Exception as e:
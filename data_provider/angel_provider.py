@@ -16,8 +16,8 @@ from contracts.data_provider_v1 import (
 
 import pyotp
 import logging
-from datetime import datetime, time, timedelta
-import json
+import threading
+from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any
 import time as time_module
 import pandas as pd
@@ -25,14 +25,45 @@ import numpy as np
 
 try:
     from SmartApi import SmartConnect
+    from utils.http_pool import SMARTAPI_POOL
 except ImportError:
     logging.warning("SmartApi not installed. Install with: pip install smartapi-python")
     SmartConnect = None
 
 from config.credentials_manager import SecureCredentialsManager
+from utils.fast_json import json_loads
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger("AngelProvider")
 
+# NSE cash session, as seconds since midnight
+_MARKET_START_S = 9 * 3600 + 15 * 60
+_MARKET_END_S = 15 * 3600 + 30 * 60
+
+# Fallback prices used when no live quote is available (interned keys)
+_FALLBACK_PRICES = {sys.intern(k): v for k, v in {
+    'RELIANCE': 2895.00, 'TCS': 4012.00, 'HDFCBANK': 1648.00,
+    'INFY': 1867.00, 'ICICIBANK': 1296.00, 'SBIN': 836.00,
+    'CASTROLIND': 189.00, 'BPCL': 1000.00
+}.items()}
+
+# Seconds a fetched LTP is reused before hitting the API again
+_LTP_CACHE_TTL = 1.0
+
+# SmartAPI getMarketData accepts at most 50 tokens per request
+_MARKET_DATA_BATCH = 50
+
+# Last formatted server_time, reused while the wall-clock second is unchanged
+_TS_CACHE = [0, '']
+
+
+def _fast_now_str() -> str:
+    """Current local time as 'YYYY-mm-dd HH:MM:SS', formatted once per second"""
+    now = int(time_module.time())
+    if now != _TS_CACHE[0]:
+        _TS_CACHE[:] = [now, time_module.strftime('%Y-%m-%d %H:%M:%S', time_module.localtime(now))]
+    return _TS_CACHE[1]
+
 
 class AngelProvider(DataProviderInterface):
     """Angel One provider implementing DataProviderInterface contract"""
@@ -45,6 +76,7 @@ class AngelProvider(DataProviderInterface):
         self.client_code = None
         self.password = None
         self.totp_secret = None
+        self._totp = None
         self.auth_token = None
         self.refresh_token = None
         self.feed_token = None
@@ -53,16 +85,22 @@ class AngelProvider(DataProviderInterface):
         self.last_request_time = 0
         self.min_request_interval = 0.1
         self.token_expiry = None
+        self._last_token_check = float('-inf')
+        self._rate_limiter = TokenBucket(rate=2.0, burst=5)
+        self._market_open_cache = (None, False)
+        
+        # Short-lived LTP cache; per-key locks collapse concurrent requests
+        # for the same symbol into one HTTP call
+        self._ltp_cache: Dict[str, Tuple[float, float]] = {}
+        self._ltp_locks: Dict[str, threading.Lock] = {}
+        self._ltp_locks_guard = threading.Lock()
         
         # Load token map
+        self._token_count = 0
         self.token_map = self._load_token_map()
         
         # Fallback prices
-        self._fallback_prices = {
-            'RELIANCE': 2895.00, 'TCS': 4012.00, 'HDFCBANK': 1648.00,
-            'INFY': 1867.00, 'ICICIBANK': 1296.00, 'SBIN': 836.00,
-            'CASTROLIND': 189.00, 'BPCL': 1000.00
-        }
+        self._fallback_prices = _FALLBACK_PRICES
         
         self._load_saved_credentials()
         logger.info(f"Angel One provider initialized (paper_mode={paper_mode})")
@@ -72,15 +110,24 @@ class AngelProvider(DataProviderInterface):
         self.ws_provider = None
         self._ws_enabled = False
     def _load_token_map(self) -> dict:
-        """Load token mapping"""
+        """Load token mapping, indexed by 'EXCH:SYMBOL' plus bare NSE symbols"""
         try:
             token_file = 'data/angel_tokens_map.json'
             if not os.path.exists(token_file):
                 return {}
-            with open(token_file, 'r') as f:
-                tokens = json.load(f)
+            with open(token_file, 'rb') as f:
+                tokens = json_loads(f.read())
+            token_map = {}
+            for key, token in tokens.items():
+                token = str(token)
+                token_map[sys.intern(key)] = token
+                # Bare aliases only for the default exchange, so a missing
+                # BSE/NFO key never resolves to another exchange's token
+                if key.startswith('NSE:'):
+                    token_map.setdefault(sys.intern(key[4:]), token)
+            self._token_count = len(tokens)
             logger.info(f"✓ Loaded {len(tokens)} tokens")
-            return tokens
+            return token_map
         except Exception as e:
             logger.error(f"Token map error: {e}")
             return {}
@@ -93,8 +140,9 @@ class AngelProvider(DataProviderInterface):
             self.client_code = credentials.get('client_code')
             self.password = credentials.get('password')
             self.totp_secret = credentials.get('totp_secret')
+            self._build_totp()
             if self.api_key and SmartConnect:
-                self.smart_api = SmartConnect(api_key=self.api_key)
+                self.smart_api = SmartConnect(api_key=self.api_key, pool=SMARTAPI_POOL)
                 logger.info("Credentials loaded")
 
     def set_credentials(self, api_key: str, client_code: str, password: str, totp_secret: str, save_credentials: bool = True) -> Tuple[bool, str]:
@@ -105,8 +153,9 @@ class AngelProvider(DataProviderInterface):
         self.client_code = client_code.strip()
         self.password = password.strip()
         self.totp_secret = totp_secret.strip()
+        self._build_totp()
         if SmartConnect:
-            self.smart_api = SmartConnect(api_key=self.api_key)
+            self.smart_api = SmartConnect(api_key=self.api_key, pool=SMARTAPI_POOL)
             if save_credentials:
                 self.credentials_manager.save_credentials(
                     self.api_key, self.client_code, self.password, self.totp_secret
@@ -115,13 +164,20 @@ class AngelProvider(DataProviderInterface):
             return True, "Credentials set"
         return False, "SmartConnect not available"
 
+    def _build_totp(self):
+        """Normalise the secret and build the TOTP object once per credential change
+
+        pyotp still base32-decodes the secret on every now(); this only skips
+        the string clean-up and object construction per call.
+        """
+        if self.totp_secret:
+            self._totp = pyotp.TOTP(self.totp_secret.replace(" ", "").upper())
+        else:
+            self._totp = None
+
     def generate_totp(self) -> Optional[str]:
         """Generate TOTP"""
-        if not self.totp_secret:
-            return None
-        clean_secret = self.totp_secret.replace(" ", "").upper()
-        totp = pyotp.TOTP(clean_secret)
-        return totp.now()
+        return self._totp.now() if self._totp else None
 
     def login(self) -> Tuple[bool, str]:
         """Login with JWT token storage"""
@@ -150,7 +206,11 @@ class AngelProvider(DataProviderInterface):
             return False, str(e)
 
     def _check_token_validity(self):
-        """Check if token needs refresh"""
+        """Check if token needs refresh (at most every 30 seconds)"""
+        now = time_module.monotonic()
+        if now - self._last_token_check < 30:
+            return
+        self._last_token_check = now
         if self.token_expiry and self.is_connected:
             if datetime.now() >= self.token_expiry - timedelta(minutes=5):
                 self._refresh_token()
@@ -187,14 +247,40 @@ class AngelProvider(DataProviderInterface):
 
     def get_token(self, symbol, exchange='NSE'):
         """Get token from map"""
-        key = f"{exchange}:{symbol}"
-        token = self.token_map.get(key) or self.token_map.get(symbol)
+        token = self.token_map.get(exchange + ':' + symbol)
+        if not token and exchange == 'NSE':
+            token = self.token_map.get(symbol)
         if not token:
-            logger.warning(f"Token not found for {key}")
-        return str(token) if token else None
+            logger.warning("Token not found for %s:%s", exchange, symbol)
+        return token
+
+    def _cached_ltp(self, key: str) -> Optional[float]:
+        """Return a cached LTP if it is younger than _LTP_CACHE_TTL"""
+        cached = self._ltp_cache.get(key)
+        if cached and time_module.monotonic() - cached[0] < _LTP_CACHE_TTL:
+            return cached[1]
+        return None
 
     def get_ltp(self, symbol: str, exchange: str) -> Optional[float]:
         """CONTRACT METHOD: Get live LTP"""
+        key = exchange + ':' + symbol
+        ltp = self._cached_ltp(key)
+        if ltp is not None:
+            return ltp
+        
+        with self._ltp_locks_guard:
+            lock = self._ltp_locks.setdefault(key, threading.Lock())
+        with lock:
+            # Another caller may have fetched it while we waited
+            ltp = self._cached_ltp(key)
+            if ltp is None:
+                ltp = self._fetch_ltp(symbol, exchange)
+                if ltp is not None:
+                    self._ltp_cache[key] = (time_module.monotonic(), ltp)
+            return ltp
+
+    def _fetch_ltp(self, symbol: str, exchange: str) -> Optional[float]:
+        """Fetch LTP from the REST API (uncached)"""
         self._check_token_validity()
         
         if self.is_connected:
@@ -207,7 +293,7 @@ class AngelProvider(DataProviderInterface):
                 
                 if data.get('status'):
                     ltp = float(data['data']['ltp'])
-                    logger.info(f"✓ REAL LTP for {symbol}: ₹{ltp:.2f}")
+                    logger.info("✓ REAL LTP for %s: ₹%.2f", symbol, ltp)
                     return ltp
                 else:
                     if 'Invalid Token' in data.get('message', ''):
@@ -217,10 +303,41 @@ class AngelProvider(DataProviderInterface):
                                 return float(data['data']['ltp'])
                     return None
             except Exception as e:
-                logger.error(f"LTP error for {symbol}: {e}")
+                logger.error("LTP error for %s: %s", symbol, e)
         
         return None
 
+    def _get_ltp_batch(self, instruments: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        """Fetch LTPs for (symbol, exchange) pairs, keyed by (exchange, symbol)"""
+        requested = []
+        symbol_for_token = {}
+        for symbol, exchange in instruments:
+            token = self.get_token(symbol, exchange)
+            if token:
+                requested.append((exchange, token))
+                symbol_for_token[(exchange, token)] = symbol
+        
+        prices: Dict[Tuple[str, str], float] = {}
+        for start in range(0, len(requested), _MARKET_DATA_BATCH):
+            exchange_tokens: Dict[str, List[str]] = {}
+            for exchange, token in requested[start:start + _MARKET_DATA_BATCH]:
+                exchange_tokens.setdefault(exchange, []).append(token)
+            try:
+                self._rate_limiter.acquire()
+                data = self.smart_api.getMarketData('LTP', exchange_tokens)
+                if data and data.get('status'):
+                    for quote in data['data'].get('fetched', []):
+                        symbol = symbol_for_token.get((quote['exchange'], str(quote['symbolToken'])))
+                        if symbol:
+                            ltp = float(quote['ltp'])
+                            prices[(quote['exchange'], symbol)] = ltp
+                            self._ltp_cache[quote['exchange'] + ':' + symbol] = (
+                                time_module.monotonic(), ltp
+                            )
+            except Exception as e:
+                logger.error("Batch LTP error: %s", e)
+        return prices
+
     def get_holdings(self) -> List[PortfolioHolding]:
         """CONTRACT METHOD: Fetch real holdings from Angel One"""
         # Try WebSocket first (NO RATE LIMITS!)
@@ -231,21 +348,8 @@ class AngelProvider(DataProviderInterface):
             # Symbol not subscribed yet, will use REST API below
 
         # Fallback to REST API
-        # ✅ GLOBAL RATE LIMITING - Applied to ALL get_ltp calls
-        import time
-        import threading
-        
-        # Thread-safe rate limiting using a lock
-        if not hasattr(self, '_ltp_lock'):
-            self._ltp_lock = threading.Lock()
-            self._last_ltp_call = 0
-        
-        with self._ltp_lock:
-            # Enforce minimum 0.5 second delay between ANY get_ltp calls
-            elapsed = time.time() - self._last_ltp_call
-            if elapsed < 0.5:
-                time.sleep(0.5 - elapsed)
-            self._last_ltp_call = time.time()
+        # ✅ Token bucket - only blocks when the request budget is spent
+        self._rate_limiter.acquire()
         
         if not self.smart_api or not self.is_connected:
             logger.warning("Not connected to Angel One")
@@ -257,18 +361,20 @@ class AngelProvider(DataProviderInterface):
             response = self.smart_api.holding()
             
             if not response or not response.get('status'):
-                logger.error(f"Holdings API failed: {response}")
+                logger.error("Holdings API failed: %s", response)
                 return []
             
             holdings_data = response.get('data', [])
             holdings: List[PortfolioHolding] = []
             
+            # Get live prices for all holdings in one batched request
+            live_prices = self._get_ltp_batch(
+                [(item['tradingsymbol'], item['exchange']) for item in holdings_data]
+            )
+            
             for item in holdings_data:
-                # Get live price
-                current_price = self.get_ltp(
-                    item['tradingsymbol'],
-                    item['exchange']
-                ) or float(item.get('ltp', item.get('averageprice', 0)))
+                current_price = live_prices.get((item['exchange'], item['tradingsymbol'])) \
+                    or float(item.get('ltp', item.get('averageprice', 0)))
                 
                 avg_price = float(item.get('averageprice', 0))
                 quantity = int(item.get('quantity', 0))
@@ -287,11 +393,11 @@ class AngelProvider(DataProviderInterface):
                 }
                 holdings.append(holding)
             
-            logger.info(f"✓ Fetched {len(holdings)} holdings from Angel One")
+            logger.info("✓ Fetched %d holdings from Angel One", len(holdings))
             return holdings
             
         except Exception as e:
-            logger.error(f"Holdings error: {e}")
+            logger.error("Holdings error: %s", e)
             return []
 
     def get_funds(self) -> FundsInfo:
@@ -354,13 +460,18 @@ class AngelProvider(DataProviderInterface):
                 }
                 data = self.smart_api.getCandleData(params)
                 if data.get('status'):
-                    df = pd.DataFrame(
-                        data['data'],
-                        columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+                    candles = data['data']
+                    # Timestamps parse with an explicit format; OHLCV converts in one call
+                    timestamps = pd.to_datetime(
+                        [c[0] for c in candles], format='%Y-%m-%dT%H:%M:%S%z', cache=True
+                    )
+                    ohlcv = np.asarray([c[1:] for c in candles], dtype=np.float64)
+                    return pd.DataFrame(
+                        ohlcv.reshape(-1, 5),
+                        columns=['open', 'high', 'low', 'close', 'volume'],
+                        index=pd.DatetimeIndex(timestamps, name='timestamp'),
+                        copy=False
                     )
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
-                    df.set_index('timestamp', inplace=True)
-                    return df
             except Exception as e:
                 logger.error(f"Historical data error: {e}")
         
@@ -369,20 +480,30 @@ class AngelProvider(DataProviderInterface):
     def _generate_fallback_historical(self, symbol, period_days):
         """Generate fallback data"""
         base_price = self._fallback_prices.get(symbol, 1000.00)
-        dates = pd.date_range(end=datetime.now(), periods=period_days * 375, freq='1min')
-        returns = np.random.randn(len(dates)) * 0.001
-        price_series = base_price * (1 + returns).cumprod()
+        n = period_days * 375
+        dates = pd.date_range(end=datetime.now(), periods=n, freq='1min', name='timestamp')
+        rng = np.random.default_rng()
+        
+        # Random walk built in place, then fanned out into one OHLCV block
+        price = rng.standard_normal(n, dtype=np.float32)
+        price *= 0.001
+        price += 1.0
+        np.cumprod(price, out=price)
+        price *= np.float32(base_price)
+        
+        ohlcv = np.empty((n, 5), dtype=np.float32)
+        ohlcv[:, 0] = price
+        np.multiply(price, np.float32(1.001), out=ohlcv[:, 1])
+        np.multiply(price, np.float32(0.999), out=ohlcv[:, 2])
+        ohlcv[:, 3] = price
+        ohlcv[:, 4] = rng.uniform(10000, 100000, n)
         
-        df = pd.DataFrame({
-            'timestamp': dates,
-            'open': price_series,
-            'high': price_series * 1.001,
-            'low': price_series * 0.999,
-            'close': price_series,
-            'volume': np.random.uniform(10000, 100000, len(dates))
-        })
-        df.set_index('timestamp', inplace=True)
-        return df
+        return pd.DataFrame(
+            ohlcv,
+            columns=['open', 'high', 'low', 'close', 'volume'],
+            index=dates,
+            copy=False
+        )
 
     def snapshot(self) -> dict:
         """Provider snapshot"""
@@ -391,9 +512,9 @@ class AngelProvider(DataProviderInterface):
             "paper_mode": self.paper_mode,
             "connected": self.is_connected,
             "data_source": "LIVE Angel One API" if self.is_connected else "Fallback prices",
-            "server_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "server_time": _fast_now_str(),
             "client_code": self.client_code or "Not set",
-            "tokens_loaded": len(self.token_map)
+            "tokens_loaded": self._token_count
         }
 
     def account_name(self) -> str:
@@ -405,8 +526,11 @@ class AngelProvider(DataProviderInterface):
     def is_market_open(self) -> bool:
         """Check if market is open"""
         now = datetime.now()
-        if now.weekday() >= 5:
-            return False
-        market_start = time(9, 15)
-        market_end = time(15, 30)
-        return market_start <= now.time() <= market_end
\ No newline at end of file
+        minute = (now.year, now.month, now.day, now.hour, now.minute)
+        # Session boundaries fall on whole minutes, so one answer per minute
+        if self._market_open_cache[0] == minute:
+            return self._market_open_cache[1]
+        seconds = now.hour * 3600 + now.minute * 60
+        is_open = now.weekday() < 5 and _MARKET_START_S <= seconds < _MARKET_END_S
+        self._market_open_cache = (minute, is_open)
+        return is_open
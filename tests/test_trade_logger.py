@@ -0,0 +1,105 @@
+"""
+Standalone test script for TradeLogger persistence.
+Run: python tests/test_trade_logger.py
+
+- Logs entries/exits and reloads them from the JSON lines file
+- Migrates an old whole-file trades_<date>.json log
+- Skips a torn (malformed) trailing line
+
+Excel output is disabled, so pandas is not needed.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['TRADE_LOGGER_EXCEL'] = '0'
+
+from trade_logger import TradeLogger
+
+
+def test_reload_round_trip():
+    print("\n=== Entry/exit then reload ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        tl = TradeLogger(log_dir=log_dir)
+        tl.log_entry('A1', 'RELIANCE', 'BUY', 10, 2500.0, stoploss=2450.0)
+        tl.log_entry('A2', 'INFY', 'SELL', 5, 1600.0)
+        tl.log_entry('A3', 'TCS', 'BUY', 2, 4000.0)
+        tl.log_exit('A1', 2520.0, remarks='target')
+        tl.log_exit('A2', 1610.0)
+        tl.close()
+
+        reloaded = TradeLogger(log_dir=log_dir)
+        print("Summary:", reloaded.get_trade_summary())
+        assert reloaded.trades == tl.trades
+        assert reloaded.get_trade_summary() == tl.get_trade_summary()
+        assert [t['order_id'] for t in reloaded.get_open_trades()] == ['A3']
+        assert [t['order_id'] for t in reloaded.get_closed_trades()] == ['A1', 'A2']
+        assert reloaded.get_trade_summary()['total_pnl'] == 150.0
+        reloaded.close()
+
+
+def test_legacy_json_migration():
+    print("\n=== Legacy .json migration ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        today = datetime.now().strftime('%Y-%m-%d')
+        legacy = [{
+            'order_id': 'L1', 'symbol': 'SBIN', 'action': 'BUY', 'quantity': 1,
+            'entry_price': 800.0, 'exit_price': 810.0,
+            'entry_time': f'{today} 09:30:00', 'exit_time': f'{today} 10:00:00',
+            'stoploss': None, 'target': None, 'pnl': 10.0, 'pnl_percent': 1.25,
+            'status': 'CLOSED', 'remarks': ''
+        }]
+        with open(os.path.join(log_dir, f'trades_{today}.json'), 'w') as f:
+            json.dump(legacy, f)
+
+        migrated = TradeLogger(log_dir=log_dir)
+        print("Migrated:", migrated.trades)
+        assert migrated.trades == legacy
+        assert os.path.exists(migrated.json_file)
+        migrated.close()
+
+        # The JSON lines copy is now the source of truth
+        assert TradeLogger(log_dir=log_dir).trades == legacy
+
+
+def test_torn_trailing_line():
+    print("\n=== Malformed trailing line ===")
+    with tempfile.TemporaryDirectory() as log_dir:
+        tl = TradeLogger(log_dir=log_dir)
+        tl.log_entry('T1', 'BPCL', 'BUY', 3, 1000.0)
+        tl.log_exit('T1', 990.0)
+        tl.close()
+        with open(tl.json_file, 'a') as f:
+            f.write('{"order_id": "T2", "symbol": "SB')
+
+        reloaded = TradeLogger(log_dir=log_dir)
+        print("Trades:", reloaded.trades)
+        assert reloaded.trades == tl.trades
+        assert reloaded.get_trade_summary()['losing_trades'] == 1
+
+        # Trades logged after the torn line must survive the next reload
+        reloaded.log_entry('T3', 'SBIN', 'BUY', 1, 800.0)
+        reloaded.log_exit('T3', 810.0)
+        reloaded.close()
+
+        again = TradeLogger(log_dir=log_dir)
+        print("After append:", again.trades)
+        assert [t['order_id'] for t in again.trades] == ['T1', 'T3']
+        assert again.get_trade_summary()['open_trades'] == 0
+        assert again.get_trade_summary()['closed_trades'] == 2
+        again.close()
+
+
+def run_tests():
+    test_reload_round_trip()
+    test_legacy_json_migration()
+    test_torn_trailing_line()
+    print("\nAll TradeLogger tests passed")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -8,121 +8,299 @@ NO PATCHING REQUIRED - This is the complete file
 
 import os
 import json
-import pandas as pd
+import time
+import atexit
+import threading
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+_DATE_FMT = '%Y-%m-%d'
+_TIME_FMT = '%H:%M:%S'
+
 class TradeLogger:
     """Comprehensive trade logging system with Excel export"""
     
+    # pandas/numpy, imported on the first Excel export and shared by instances
+    _pd = None
+    _np = None
+    
     def __init__(self, log_dir='logs/trades'):
         self.log_dir = log_dir
         os.makedirs(log_dir, exist_ok=True)
         
         # Get today's date for filename
-        self.today = datetime.now().strftime('%Y-%m-%d')
+        self.today = datetime.now().strftime(_DATE_FMT)
+        self._today_yday = time.localtime().tm_yday
         self.excel_file = os.path.join(log_dir, f'trades_{self.today}.xlsx')
-        self.json_file = os.path.join(log_dir, f'trades_{self.today}.json')
+        # Append-only JSON lines: one record per entry, one delta per exit
+        self.json_file = os.path.join(log_dir, f'trades_{self.today}.jsonl')
+        self._legacy_json_file = os.path.join(log_dir, f'trades_{self.today}.json')
+        
+        # Set TRADE_LOGGER_EXCEL=0 for headless runs: trades still go to the
+        # JSON lines log, but the workbook is only written on save_to_excel()
+        self._excel_enabled = os.environ.get('TRADE_LOGGER_EXCEL', '1') != '0'
         
         # Load existing trades if any
         self.trades = self._load_trades()
+        self._index_trades()
+        
+        # Saves run on a background writer so log_entry/log_exit return
+        # immediately; a burst of fills is coalesced into one write
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer = None
+        if self._excel_enabled:
+            self._writer = threading.Thread(
+                target=self._writer_loop, name="TradeLoggerWriter", daemon=True
+            )
+            self._writer.start()
+            atexit.register(self.close)
+        
         logger.info(f"TradeLogger initialized. File: {self.excel_file}")
         
     def _load_trades(self):
-        """Load existing trades from JSON file"""
-        if os.path.exists(self.json_file):
-            try:
-                with open(self.json_file, 'r') as f:
-                    trades = json.load(f)
-                logger.info(f"Loaded {len(trades)} existing trades from {self.json_file}")
-                return trades
-            except Exception as e:
-                logger.error(f"Error loading trades: {e}")
-                return []
-        return []
+        """Load existing trades by replaying the JSON lines file"""
+        if not os.path.exists(self.json_file):
+            return self._load_legacy_trades()
+        
+        trades = []
+        latest_by_id = {}
+        try:
+            with open(self.json_file, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    # A crash mid-append leaves a torn last line; cut it off so
+                    # the next append starts on a fresh line
+                    logger.warning(f"Dropping torn trailing line in {self.json_file}")
+                    data = data[:data.rfind(b'\n') + 1]
+                    f.truncate(len(data))
+            
+            for line_no, line in enumerate(data.decode('utf-8').splitlines(), 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping malformed line {line_no} in {self.json_file}")
+                    continue
+                if record.get('op') == 'close':
+                    trade = latest_by_id.get(record.get('order_id'))
+                    if trade:
+                        trade.update({k: v for k, v in record.items() if k != 'op'})
+                else:
+                    trades.append(record)
+                    latest_by_id[record.get('order_id')] = record
+            logger.info(f"Loaded {len(trades)} existing trades from {self.json_file}")
+            return trades
+        except Exception as e:
+            logger.error(f"Error loading trades: {e}")
+            return []
     
-    def _save_trades(self):
-        """Save trades to both JSON and Excel"""
+    def _load_legacy_trades(self):
+        """Import trades from the old whole-file JSON format, if present"""
+        if not os.path.exists(self._legacy_json_file):
+            return []
         try:
-            # Save to JSON (for quick loading)
+            with open(self._legacy_json_file, 'r') as f:
+                trades = json.load(f)
             with open(self.json_file, 'w') as f:
-                json.dump(self.trades, f, indent=2)
+                f.writelines(json.dumps(t) + '\n' for t in trades)
+            logger.info(f"Migrated {len(trades)} trades from {self._legacy_json_file}")
+            return trades
+        except Exception as e:
+            logger.error(f"Error loading trades: {e}")
+            return []
+    
+    def _index_trades(self):
+        """Build order_id lookups so exits and open/closed queries skip scans"""
+        self._by_id = {}
+        self._open_ids = {}  # dict as an insertion-ordered set
+        self._closed = []
+        # Running totals so get_trade_summary is O(1)
+        self._counts = {'wins': 0, 'losses': 0}
+        self._total_pnl = 0.0
+        for trade in self.trades:
+            self._by_id[trade['order_id']] = trade
+            if trade['status'] == 'OPEN':
+                self._open_ids[trade['order_id']] = None
+            elif trade['status'] == 'CLOSED':
+                self._closed.append(trade)
+            self._count_pnl(trade.get('pnl'))
+    
+    def _count_pnl(self, pnl):
+        """Fold one trade's P&L into the running totals"""
+        if not pnl:
+            return
+        self._total_pnl += pnl
+        if pnl > 0:
+            self._counts['wins'] += 1
+        else:
+            self._counts['losses'] += 1
+    
+    def _timestamp(self):
+        """Current 'YYYY-MM-DD HH:MM:SS', reusing the date prefix until midnight"""
+        now = time.localtime()
+        if now.tm_yday != self._today_yday:
+            self.today = time.strftime(_DATE_FMT, now)
+            self._today_yday = now.tm_yday
+        return f"{self.today} {time.strftime(_TIME_FMT, now)}"
+    
+    def _append_record(self, record):
+        """Append one JSON line (caller holds self._lock to keep order)"""
+        try:
+            with open(self.json_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        except Exception as e:
+            logger.error(f"Error appending trade record: {e}")
+    
+    def _mark_dirty(self):
+        """Flag unsaved changes and wake the background writer"""
+        self._dirty.set()
+        self._wake.set()
+    
+    def _writer_loop(self):
+        """Background writer: wait for changes, debounce, then save once"""
+        while not self._stop.is_set():
+            self._wake.wait()
+            # Debounce; close() cuts the wait short
+            self._stop.wait(0.5)
+            self._wake.clear()
+            self.flush()
+    
+    def flush(self):
+        """Write any pending trades now, waiting for an in-flight write first"""
+        with self._save_lock:
+            if self._dirty.is_set():
+                self._dirty.clear()
+                self._save_trades()
+    
+    def close(self):
+        """Stop the background writer and write any pending trades"""
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+            atexit.unregister(self.close)
+        self.flush()
+    
+    def _save_trades(self):
+        """Regenerate the Excel workbook from a snapshot (caller holds self._save_lock)"""
+        if not self._excel_enabled:
+            return
+        
+        with self._lock:
+            trades = [dict(t) for t in self.trades]
+        
+        try:
+            self._write_excel(trades, self.excel_file)
+        except Exception as e:
+            logger.error(f"Error saving trades: {e}")
+    
+    def save_to_excel(self, filename=None):
+        """Export trades to Excel now (defaults to today's workbook)
+
+        Unlike the background save, errors propagate to the caller.
+        """
+        with self._lock:
+            trades = [dict(t) for t in self.trades]
+        
+        with self._save_lock:
+            self._write_excel(trades, filename or self.excel_file)
+    
+    @classmethod
+    def _excel_modules(cls):
+        """Import pandas/numpy on first export, not at startup"""
+        if cls._pd is None:
+            import numpy as np
+            import pandas as pd
+            cls._np, cls._pd = np, pd
+        return cls._np, cls._pd
+    
+    def _write_excel(self, trades, excel_file):
+        """Write a snapshot of trades to an Excel workbook"""
+        if trades:
+            np, pd = self._excel_modules()
+            
+            # Fixed column order for readability; explicit columns and
+            # dtypes skip per-row inference over the list of dicts
+            column_order = [
+                'order_id', 'symbol', 'action', 'quantity',
+                'entry_price', 'exit_price', 'entry_time', 'exit_time',
+                'stoploss', 'target', 'pnl', 'pnl_percent',
+                'status', 'remarks'
+            ]
+            df = pd.DataFrame.from_records(trades, columns=column_order)
+            df = df.astype({
+                'quantity': 'Int64',
+                'entry_price': 'float64',
+                'exit_price': 'float64',
+                'stoploss': 'float64',
+                'target': 'float64',
+                'pnl': 'float64',
+                'pnl_percent': 'float64'
+            }, errors='ignore')
             
-            # Save to Excel (for user analysis)
-            if self.trades:
-                df = pd.DataFrame(self.trades)
+            # Format numeric columns in one vectorised pass (blank when missing)
+            numeric_cols = ['entry_price', 'exit_price', 'stoploss', 'target', 'pnl', 'pnl_percent']
+            # Already float64 unless a legacy record held a bad value
+            num = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+            total_pnl = num['pnl'].sum()
+            
+            text = pd.DataFrame(
+                np.char.mod('%.2f', num.to_numpy(dtype=float)),
+                index=num.index,
+                columns=numeric_cols
+            )
+            text['pnl_percent'] = text['pnl_percent'] + '%'
+            df[numeric_cols] = text.where(num.notna(), '')
+            
+            # Write to Excel with formatting (xlsxwriter streams the XML;
+            # openpyxl would build the whole workbook DOM first)
+            with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
+                df.to_excel(writer, sheet_name='Trades', index=False)
                 
-                # Reorder columns for better readability
-                column_order = [
-                    'order_id', 'symbol', 'action', 'quantity',
-                    'entry_price', 'exit_price', 'entry_time', 'exit_time',
-                    'stoploss', 'target', 'pnl', 'pnl_percent',
-                    'status', 'remarks'
-                ]
+                # Get workbook and worksheet
+                workbook = writer.book
+                worksheet = writer.sheets['Trades']
                 
-                # Only include columns that exist
-                existing_cols = [col for col in column_order if col in df.columns]
-                df = df[existing_cols]
+                # Auto-adjust column widths (one pass over the stringified frame)
+                widths = df.astype(str).agg(lambda s: s.str.len().max())
+                for idx, (col, width) in enumerate(widths.items()):
+                    max_length = max(int(width), len(col))
+                    worksheet.set_column(idx, idx, min(max_length + 2, 50))
                 
-                # Format numeric columns
-                numeric_cols = ['entry_price', 'exit_price', 'stoploss', 'target', 'pnl']
-                for col in numeric_cols:
-                    if col in df.columns:
-                        df[col] = df[col].apply(lambda x: f"{x:.2f}" if pd.notna(x) else "")
+                # Add summary at the bottom (zero-based rows)
+                bold = workbook.add_format({'bold': True})
+                summary_row = len(df) + 2
+                worksheet.write(summary_row, 0, 'SUMMARY', bold)
                 
-                if 'pnl_percent' in df.columns:
-                    df['pnl_percent'] = df['pnl_percent'].apply(
-                        lambda x: f"{x:.2f}%" if pd.notna(x) else ""
-                    )
+                total_trades = len(df)
+                completed_trades = len(df[df['status'] == 'CLOSED'])
+                open_trades = len(df[df['status'] == 'OPEN'])
                 
-                # Write to Excel with formatting
-                with pd.ExcelWriter(self.excel_file, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='Trades', index=False)
-                    
-                    # Get workbook and worksheet
-                    workbook = writer.book
-                    worksheet = writer.sheets['Trades']
-                    
-                    # Auto-adjust column widths
-                    for idx, col in enumerate(df.columns, 1):
-                        max_length = max(
-                            df[col].astype(str).apply(len).max(),
-                            len(col)
-                        )
-                        column_letter = chr(64 + idx)
-                        worksheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
-                    
-                    # Add summary at the bottom
-                    summary_row = len(df) + 3
-                    worksheet[f'A{summary_row}'] = 'SUMMARY'
-                    worksheet[f'A{summary_row}'].font = workbook.create_font(bold=True)
-                    
-                    total_trades = len(df)
-                    completed_trades = len(df[df['status'] == 'CLOSED'])
-                    open_trades = len(df[df['status'] == 'OPEN'])
-                    total_pnl = df['pnl'].sum() if 'pnl' in df.columns else 0
-                    
-                    worksheet[f'A{summary_row + 1}'] = 'Total Trades:'
-                    worksheet[f'B{summary_row + 1}'] = total_trades
-                    worksheet[f'A{summary_row + 2}'] = 'Completed Trades:'
-                    worksheet[f'B{summary_row + 2}'] = completed_trades
-                    worksheet[f'A{summary_row + 3}'] = 'Open Trades:'
-                    worksheet[f'B{summary_row + 3}'] = open_trades
-                    worksheet[f'A{summary_row + 4}'] = 'Total P&L:'
-                    worksheet[f'B{summary_row + 4}'] = f"₹{total_pnl:.2f}"
-                    
-                    # Color code P&L
-                    if total_pnl >= 0:
-                        worksheet[f'B{summary_row + 4}'].font = workbook.create_font(bold=True, color='00FF00')
-                    else:
-                        worksheet[f'B{summary_row + 4}'].font = workbook.create_font(bold=True, color='FF0000')
+                worksheet.write(summary_row + 1, 0, 'Total Trades:')
+                worksheet.write(summary_row + 1, 1, total_trades)
+                worksheet.write(summary_row + 2, 0, 'Completed Trades:')
+                worksheet.write(summary_row + 2, 1, completed_trades)
+                worksheet.write(summary_row + 3, 0, 'Open Trades:')
+                worksheet.write(summary_row + 3, 1, open_trades)
+                worksheet.write(summary_row + 4, 0, 'Total P&L:')
                 
-                logger.info(f"Saved {len(self.trades)} trades to Excel: {self.excel_file}")
+                # Color code P&L
+                pnl_format = workbook.add_format({
+                    'bold': True,
+                    'font_color': '#00FF00' if total_pnl >= 0 else '#FF0000'
+                })
+                worksheet.write(summary_row + 4, 1, f"₹{total_pnl:.2f}", pnl_format)
             
-        except Exception as e:
-            logger.error(f"Error saving trades: {e}")
+            logger.info(f"Saved {len(trades)} trades to Excel: {excel_file}")
     
     def log_entry(self, order_id, symbol, action, quantity, price, 
                    stoploss=None, target=None, remarks=''):
@@ -134,7 +312,7 @@ class TradeLogger:
             'quantity': quantity,
             'entry_price': price,
             'exit_price': None,
-            'entry_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'entry_time': self._timestamp(),
             'exit_time': None,
             'stoploss': stoploss,
             'target': target,
@@ -144,18 +322,23 @@ class TradeLogger:
             'remarks': remarks
         }
         
-        self.trades.append(trade)
-        self._save_trades()
+        with self._lock:
+            self.trades.append(trade)
+            self._by_id[order_id] = trade
+            self._open_ids[order_id] = None
+            self._append_record(trade)
+        self._mark_dirty()
         
         logger.info(f"✓ Trade Entry Logged: {action} {quantity} {symbol} @ ₹{price:.2f}")
         return order_id
     
     def log_exit(self, order_id, exit_price, remarks=''):
         """Log trade exit and calculate P&L"""
-        for trade in self.trades:
-            if trade['order_id'] == order_id and trade['status'] == 'OPEN':
+        with self._lock:
+            trade = self._by_id.get(order_id)
+            if trade and trade['status'] == 'OPEN':
                 trade['exit_price'] = exit_price
-                trade['exit_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                trade['exit_time'] = self._timestamp()
                 trade['status'] = 'CLOSED'
                 trade['remarks'] = f"{trade['remarks']} | {remarks}".strip(' |')
                 
@@ -170,34 +353,53 @@ class TradeLogger:
                 
                 trade['pnl_percent'] = (trade['pnl'] / entry_value) * 100
                 
-                self._save_trades()
-                
-                logger.info(
-                    f"✓ Trade Exit Logged: {trade['symbol']} @ ₹{exit_price:.2f} | "
-                    f"P&L: ₹{trade['pnl']:.2f} ({trade['pnl_percent']:.2f}%)"
-                )
-                return True
+                self._append_record({
+                    'op': 'close',
+                    'order_id': order_id,
+                    'exit_price': exit_price,
+                    'exit_time': trade['exit_time'],
+                    'status': 'CLOSED',
+                    'remarks': trade['remarks'],
+                    'pnl': trade['pnl'],
+                    'pnl_percent': trade['pnl_percent']
+                })
+                self._open_ids.pop(order_id, None)
+                self._closed.append(trade)
+                self._count_pnl(trade['pnl'])
+            else:
+                trade = None
+        
+        if trade is None:
+            logger.warning(f"Trade {order_id} not found or already closed")
+            return False
+        
+        self._mark_dirty()
         
-        logger.warning(f"Trade {order_id} not found or already closed")
-        return False
+        logger.info(
+            f"✓ Trade Exit Logged: {trade['symbol']} @ ₹{exit_price:.2f} | "
+            f"P&L: ₹{trade['pnl']:.2f} ({trade['pnl_percent']:.2f}%)"
+        )
+        return True
     
     def get_open_trades(self):
         """Get all open trades"""
-        return [t for t in self.trades if t['status'] == 'OPEN']
+        with self._lock:
+            return [self._by_id[order_id] for order_id in self._open_ids]
     
     def get_closed_trades(self):
         """Get all closed trades"""
-        return [t for t in self.trades if t['status'] == 'CLOSED']
+        with self._lock:
+            return list(self._closed)
     
     def get_trade_summary(self):
         """Get summary statistics"""
-        total_trades = len(self.trades)
-        open_trades = len(self.get_open_trades())
-        closed_trades = len(self.get_closed_trades())
-        
-        total_pnl = sum(t.get('pnl', 0) for t in self.trades if t.get('pnl'))
-        winning_trades = len([t for t in self.trades if t.get('pnl', 0) > 0])
-        losing_trades = len([t for t in self.trades if t.get('pnl', 0) < 0])
+        with self._lock:
+            total_trades = len(self.trades)
+            open_trades = len(self._open_ids)
+            closed_trades = len(self._closed)
+            total_pnl = self._total_pnl
+            winning_trades = self._counts['wins']
+            losing_trades = self._counts['losses']
         
         win_rate = (winning_trades / closed_trades * 100) if closed_trades > 0 else 0
         
@@ -209,4 +411,4 @@ class TradeLogger:
             'winning_trades': winning_trades,
             'losing_trades': losing_trades,
             'win_rate': win_rate
-        }
\ No newline at end of file
+        }
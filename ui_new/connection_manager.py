@@ -23,6 +23,7 @@ from pathlib import Path
 try:
     from SmartApi import SmartConnect
     from SmartApi.smartWebSocketV2 import SmartWebSocketV2
+    from utils.http_pool import SMARTAPI_POOL
     SMARTAPI_AVAILABLE = True
 except ImportError:
     SMARTAPI_AVAILABLE = False
@@ -36,6 +37,11 @@ except ImportError:
     PYOTP_AVAILABLE = False
     print("⚠️  pyotp not installed. Run: pip install pyotp --break-system-packages")
 
+from utils.fast_json import json_loads
+
+SCRIPMASTER_URL = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
+SCRIPMASTER_CACHE = os.path.join("data", "scripmaster_cache.json")
+
 class ConnectionManager:
     """
     Connection Manager with WebSocket V2 for Real-Time Market Data
@@ -188,14 +194,9 @@ class ConnectionManager:
     def load_symbol_tokens(self):
         """Load symbol tokens from Angel One master file for multiple exchanges."""
         try:
-            import requests
-            
-            url = "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
-            response = requests.get(url, timeout=10)
+            data = self._fetch_scripmaster()
             
-            if response.status_code == 200:
-                data = response.json()
-                
+            if data is not None:
                 # Supported exchanges
                 exchanges = ["NSE", "NFO", "BSE"]
                 
@@ -229,6 +230,59 @@ class ConnectionManager:
             self._load_fallback_tokens()
             return False
     
+    def _fetch_scripmaster(self):
+        """
+        Download the Angel One ScripMaster, reusing the on-disk copy when the
+        server reports it unchanged (ETag / Last-Modified conditional GET).
+        Returns the parsed instrument list, or None if unavailable.
+        """
+        import requests
+        
+        meta_file = SCRIPMASTER_CACHE + '.meta'
+        have_cache = os.path.exists(SCRIPMASTER_CACHE)
+        meta = {}
+        if have_cache and os.path.exists(meta_file):
+            try:
+                with open(meta_file, 'r') as f:
+                    meta = json.load(f)
+            except Exception:
+                meta = {}
+        
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        
+        try:
+            response = requests.get(SCRIPMASTER_URL, headers=headers, timeout=10)
+        except Exception as e:
+            print(f"⚠️  ScripMaster download failed: {e}")
+            response = None
+        
+        if response is not None and response.status_code == 200:
+            content = response.content
+            try:
+                os.makedirs(os.path.dirname(SCRIPMASTER_CACHE), exist_ok=True)
+                with open(SCRIPMASTER_CACHE, 'wb') as f:
+                    f.write(content)
+                with open(meta_file, 'w') as f:
+                    json.dump({
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')
+                    }, f)
+            except Exception as e:
+                print(f"⚠️  Could not cache ScripMaster: {e}")
+            return json_loads(content)
+        
+        # 304 Not Modified, or server unreachable - use the cached copy
+        if have_cache:
+            if response is not None and response.status_code == 304:
+                print("✅ ScripMaster unchanged, using cached copy")
+            with open(SCRIPMASTER_CACHE, 'rb') as f:
+                return json_loads(f.read())
+        return None
+    
     def _load_fallback_tokens(self):
         """Fallback token map for major stocks"""
         self.token_map = {
@@ -324,7 +378,7 @@ class ConnectionManager:
                 return False
             
             # Create SmartConnect instance
-            self.smart_api = SmartConnect(api_key=self.api_key)
+            self.smart_api = SmartConnect(api_key=self.api_key, pool=SMARTAPI_POOL)
             
             # Generate TOTP
             if PYOTP_AVAILABLE and totp_secret:
@@ -128,6 +128,10 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'paper_trading_tab'):
             self.paper_trading_tab.save_trades()
         
+        # Stop background holdings refreshes
+        if hasattr(self, 'holdings_tab'):
+            self.holdings_tab.shutdown()
+        
         # Close WebSocket connection
         if self.conn_mgr:
             self.conn_mgr.close()
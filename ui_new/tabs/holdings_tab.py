@@ -1,16 +1,30 @@
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QFrame
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QColor
 
 class HoldingsTab(QWidget):
     """Holdings tab - fetches REAL data from broker via Connection Manager"""
     
+    # Emitted from a worker thread; Qt queues delivery onto the GUI thread
+    data_loaded = pyqtSignal(object, object)  # holdings, funds
+    load_failed = pyqtSignal(str)  # Error message
+    
     def __init__(self, parent, conn_mgr):
         super().__init__(parent)
         self.parent = parent
         self.conn_mgr = conn_mgr  # Connection manager
         self.init_ui()
         
+        # Holdings and funds are independent REST calls - one long-lived pool
+        # fetches them concurrently off the GUI thread
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="HoldingsRefresh")
+        self._refreshing = False
+        self._stopped = False
+        self.data_loaded.connect(self.on_data_loaded)
+        self.load_failed.connect(self.on_load_failed)
+        
         self.timer = QTimer()
         self.timer.timeout.connect(self.refresh)
         self.timer.start(30000)  # Refresh every 30 seconds
@@ -75,12 +89,41 @@ class HoldingsTab(QWidget):
     
     def refresh(self):
         """Fetch REAL holdings from broker via connection manager"""
-        # Get holdings from connection manager (handles demo/real data)
-        holdings = self.conn_mgr.get_holdings()
+        # Skip timer ticks that land while the previous fetch is still running,
+        # and anything after shutdown (connection manager handles demo/real data)
+        if self._refreshing or self._stopped:
+            return
+        self._refreshing = True
+        
+        self._pool.submit(self._fetch)
+    
+    def _fetch(self):
+        """Worker: fetch holdings and funds concurrently, then hand both to the GUI thread"""
+        try:
+            funds_future = self._pool.submit(self.conn_mgr.get_funds)
+            holdings = self.conn_mgr.get_holdings()
+            funds = funds_future.result()
+        except CancelledError:
+            return  # Pool shut down while the funds call was queued
+        except Exception as e:
+            if not self._stopped:
+                self.load_failed.emit(str(e))
+            return
+        
+        if not self._stopped:
+            self.data_loaded.emit(holdings, funds)
+    
+    def on_load_failed(self, error):
+        """Handle a failed refresh"""
+        self._refreshing = False
+        print(f"❌ Holdings refresh failed: {error}")
+    
+    def on_data_loaded(self, holdings, funds):
+        """Update table and fund cards (runs on the GUI thread)"""
+        self._refreshing = False
         self.display_holdings(holdings)
         
         # Update funds
-        funds = self.conn_mgr.get_funds()
         self.update_fund_card(self.cash_card, f"₹{funds['cash']:,.2f}")
         self.update_fund_card(self.margin_card, f"₹{funds['margin']:,.2f}")
         
@@ -116,3 +159,14 @@ class HoldingsTab(QWidget):
             for col, item in enumerate(items):
                 item.setTextAlignment(Qt.AlignCenter)
                 self.table.setItem(row, col, item)
+    
+    def shutdown(self):
+        """Stop the refresh timer and release the worker pool"""
+        self.timer.stop()
+        self._stopped = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+    
+    def closeEvent(self, event):
+        """Clean up worker pool when tab is closed"""
+        self.shutdown()
+        event.accept()
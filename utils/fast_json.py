@@ -0,0 +1,14 @@
+"""
+Fast JSON Parsing
+
+json_loads uses orjson when it is installed (several times faster on the
+multi-MB token map and ScripMaster files) and falls back to the stdlib.
+Both accept str or bytes.
+"""
+
+import json
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
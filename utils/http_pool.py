@@ -0,0 +1,15 @@
+"""
+HTTP Pool Settings
+
+Connection-pool options for SmartConnect(pool=...). SmartApi passes them to
+the requests HTTPAdapter it mounts on each client's own Session, so every
+SmartConnect instance keeps its own pool of keep-alive connections.
+"""
+
+from urllib3.util.retry import Retry
+
+SMARTAPI_POOL = {
+    'pool_connections': 4,
+    'pool_maxsize': 32,
+    'max_retries': Retry(total=3, backoff_factor=0.25)
+}
@@ -0,0 +1,62 @@
+"""
+Rate Limiting Utilities
+
+Token-bucket limiter shared by code paths that call the Angel One REST API.
+Callers only block when the bucket is empty, instead of sleeping a fixed
+interval before every request.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Usage:
+        bucket = TokenBucket(rate=2.0, burst=5)
+        bucket.acquire()          # blocks only if no token is available
+        smart_api.holding()
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        """Add tokens earned since the last refill (caller holds the lock)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _has_token(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting until one is available
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            bool: True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._has_token():
+                wait = (1 - self.tokens) / self.rate
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+            self.tokens -= 1
+            return True